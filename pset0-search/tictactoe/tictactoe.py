@@ -3,7 +3,6 @@ Tic Tac Toe Player
 """
 
 import math
-import copy
 
 X = "X"
 O = "O"
@@ -12,6 +11,49 @@ EMPTY = None
 MAX = 1
 MIN = -1
 
+# Cells of the rows, columns and diagonals that win the game
+LINES = (((0, 0), (0, 1), (0, 2)), ((1, 0), (1, 1), (1, 2)), ((2, 0), (2, 1), (2, 2)),
+         ((0, 0), (1, 0), (2, 0)), ((0, 1), (1, 1), (2, 1)), ((0, 2), (1, 2), (2, 2)),
+         ((0, 0), (1, 1), (2, 2)), ((0, 2), (1, 1), (2, 0)))
+
+# Bitmasks of the same lines, with cell (i, j) at bit 3 * i + j
+WIN_MASKS = (0b000000111, 0b000111000, 0b111000000,
+             0b001001001, 0b010010010, 0b100100100,
+             0b100010001, 0b001010100)
+FULL = 0b111111111
+
+# Order in which moves are tried: center, corners, then edges
+MOVE_ORDER = ((1, 1), (0, 0), (0, 2), (2, 0), (2, 2), (0, 1), (1, 0), (1, 2), (2, 1))
+CELL_ORDER = tuple(3 * i + j for (i, j) in MOVE_ORDER)
+
+
+def symmetry_table(transform):
+    """
+    Returns a lookup table mapping every 9-bit bitboard to its image under a symmetry of the square.
+    """
+    table = []
+    for bits in range(FULL + 1):
+        image = 0
+        for i in range(3):
+            for j in range(3):
+                if (bits >> (3 * i + j)) & 1:
+                    a, b = transform(i, j)
+                    image |= 1 << (3 * a + b)
+        table.append(image)
+    return tuple(table)
+
+
+# Lookup tables for the 8 rotations and reflections of the board
+SYMMETRIES = tuple(symmetry_table(transform) for transform in (
+    lambda i, j: (i, j), lambda i, j: (j, 2 - i),
+    lambda i, j: (2 - i, 2 - j), lambda i, j: (2 - j, i),
+    lambda i, j: (i, 2 - j), lambda i, j: (2 - i, j),
+    lambda i, j: (j, i), lambda i, j: (2 - j, 2 - i),
+))
+
+# Transposition table of exact utility values for the player to move, keyed on canonical bitboards
+TT = {}
+
 
 def initial_state():
     """
@@ -40,14 +82,9 @@ def player(board):
 
 def actions(board):
     """
-    Returns set of all possible actions (i, j) available on the board.
+    Returns list of all possible actions (i, j) available on the board, best candidates first.
     """
-    moves = set()
-    for i in range(3):
-        for j in range(3):
-            if board[i][j] == EMPTY:
-                moves.add((i, j))
-    return moves
+    return [(i, j) for (i, j) in MOVE_ORDER if board[i][j] == EMPTY]
 
 
 def result(board, action):
@@ -55,7 +92,7 @@ def result(board, action):
     Returns the board that results from making move (i, j) on the board.
     """
     row, cell = action
-    new_board = copy.deepcopy(board)
+    new_board = [board[0][:], board[1][:], board[2][:]]
 
     if new_board[row][cell] != EMPTY:
         raise Exception("Invalid action.")
@@ -64,64 +101,25 @@ def result(board, action):
     return new_board
 
 
-def get_columns(board):
-    """
-    Returns columns from a 3x3 matrix.
-    """
-    columns = []
-    for i in range(3):
-        columns.append([row[i] for row in board])
-    return columns
-
-
-def get_diagonals(board):
-    """
-    Returns diagonals from a 3x3 matrix.
-    """
-    return [[board[0][0], board[1][1], board[2][2]],
-            [board[0][2], board[1][1], board[2][0]]]
-
-
-def three_in_a_row(row):
-    """
-    Returns True if three consecutive moves are from the same player, False otherwise.
-    """
-    return row.count(row[0]) == 3
-
-
 def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
     # Check horizontal, vertical and diagonal moves
-    rows = board + get_columns(board)+ get_diagonals(board)
-    for row in rows:
-        if row[0] is not None and three_in_a_row(row):
-            return row[0]
+    for a, b, c in LINES:
+        v = board[a[0]][a[1]]
+        if v is not None and v == board[b[0]][b[1]] == board[c[0]][c[1]]:
+            return v
 
     # Return None if there is no winner
     return None
 
 
-def all_cells_filled(board):
-    """
-    Returns True if all cells have been filled, False otherwise.
-    """
-    for row in board:
-        for cell in row:
-            if cell == EMPTY:
-                return False
-    return True
-
-
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    if winner(board) is not None or all_cells_filled(board):
-        return True
-    else:
-        return False
+    return winner(board) is not None or not any(EMPTY in row for row in board)
 
 
 def utility(board):
@@ -137,47 +135,78 @@ def utility(board):
         return 0
 
 
-def maxvalue(board, alpha, beta):
+def to_bits(board):
     """
-    Returns max utility value for a given state.
+    Returns the board encoded as a pair of bitboards (x, o), where cell (i, j) is bit 3 * i + j.
     """
-    v = MIN
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return x, o
 
-    # If game is over, return utility
-    if terminal(board):
-        return utility(board)
 
-    # Search lower nodes and return max utility (v)
-    for action in actions(board):
-        v = max(v, minvalue(result(board, action), alpha, beta))
-        alpha = max(v, alpha)  # Update alpha if current utility is higher
+def bits_player(x, o):
+    """
+    Returns player who has the next turn on a bitboard.
+    """
+    return X if bin(x | o).count("1") % 2 == 0 else O
 
-        # Stop if maximizer's best guaranteed utility (alpha) equals/exceeds minimizer's at current node
-        if beta <= alpha:
-            break
 
-    return v
+def bits_actions(x, o):
+    """
+    Yields the index of every empty cell on a bitboard, in move order.
+    """
+    filled = x | o
+    for i in CELL_ORDER:
+        if not (filled >> i) & 1:
+            yield i
 
 
-def minvalue(board, alpha, beta):
+def canonical(x, o):
     """
-    Returns min utility value for a given state.
+    Returns the smallest of the 8 symmetric images of a bitboard, so equivalent positions share a key.
     """
-    v = MAX
+    return min((table[x], table[o]) for table in SYMMETRIES)
 
-    # If game is over, return utility
-    if terminal(board):
-        return utility(board)
 
-    # Search lower nodes and return min utility (v)
-    for action in actions(board):
-        v = min(v, maxvalue(result(board, action), alpha, beta))
-        beta = min(v, beta)  # Update beta if current utility is lower
+def solve(me, other):
+    """
+    Returns utility value of a bitboard for the player to move, whose cells are me.
+    """
+    key = canonical(me, other)
+    if key in TT:
+        return TT[key]
 
-        # Stop if minimizer's best guaranteed utility (beta) equals/is lower than maximizer's at current node
-        if beta <= alpha:
+    filled = me | other
+    lost = False
+    for mask in WIN_MASKS:
+        if other & mask == mask:
+            lost = True
             break
 
+    # If the opponent's last move won the game or the board is full, return utility
+    if lost:
+        v = MIN
+    elif filled == FULL:
+        v = 0
+
+    # Search lower nodes with the players swapped and return max utility (v)
+    else:
+        v = MIN
+        for i in CELL_ORDER:
+            bit = 1 << i
+            if not filled & bit:
+                v = max(v, -solve(other, me | bit))
+
+                # Stop if the player to move can already win, so the stored value is still exact
+                if v == MAX:
+                    break
+
+    TT[key] = v
     return v
 
 
@@ -191,42 +220,22 @@ def minimax(board):
         return None
 
     # Else, intialize local variables
-    turn = player(board)
+    x, o = to_bits(board)
+    me, other = (x, o) if bits_player(x, o) == X else (o, x)
     move = None
-    alpha = MIN
-    beta = MAX
+    v = MIN
 
     # Find the best move for the current player
-    if turn == X:
+    for i in bits_actions(x, o):
+        new_v = -solve(other, me | (1 << i))
 
-        v = MIN
-        for action in actions(board):
-            new_v = minvalue(result(board, action), alpha, beta)
-            alpha = max(new_v, alpha)  # Update alpha if current utility is higher
+        # Keep track of optimal move (any move will do if all of them lose)
+        if move is None or new_v > v:
+            move = divmod(i, 3)
+            v = new_v
 
-            # Keep track of optimal move
-            if new_v > v:
-                move = action
-                v = new_v
-
-            # Stop if no other moves lead to a better result for maximizer
-            if beta <= alpha:
-                break
-
-    else:
-
-        v = MAX
-        for action in actions(board):
-            new_v = maxvalue(result(board, action), alpha, beta)
-            beta = min(new_v, beta)  # Update beta if current utility is lower
-
-            # Keep track of optimal move
-            if new_v < v:
-                move = action
-                v = new_v
-
-            # Stop if no other moves lead to a better result for minimizer
-            if beta <= alpha:
-                break
+        # Stop if no other moves lead to a better result
+        if v == MAX:
+            break
 
     return move
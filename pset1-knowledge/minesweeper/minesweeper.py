@@ -2,6 +2,24 @@ import itertools
 import random
 
 
+def neighboring_cells(height, width):
+    """
+    Returns a dict mapping every cell on a height x width board
+    to the list of in-bounds cells within one row and column of it,
+    not including the cell itself.
+    """
+    neighbors = {}
+    for i in range(height):
+        for j in range(width):
+            neighbors[(i, j)] = [
+                (a, b)
+                for a in (i - 1, i, i + 1)
+                for b in (j - 1, j, j + 1)
+                if (a, b) != (i, j) and 0 <= a < height and 0 <= b < width
+            ]
+    return neighbors
+
+
 class Minesweeper():
     """
     Minesweeper game representation
@@ -30,6 +48,15 @@ class Minesweeper():
                 self.mines.add((i, j))
                 self.board[i][j] = True
 
+        # Find the neighbors of every cell once, since they never change
+        self.neighbors = neighboring_cells(height, width)
+
+        # Count nearby mines for every cell at once by spreading each mine to its neighbors
+        self.counts = {cell: 0 for cell in self.neighbors}
+        for mine in self.mines:
+            for cell in self.neighbors[mine]:
+                self.counts[cell] += 1
+
         # At first, player has found no mines
         self.mines_found = set()
 
@@ -58,24 +85,7 @@ class Minesweeper():
         within one row and column of a given cell,
         not including the cell itself.
         """
-
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+        return self.counts[cell]
 
     def won(self):
         """
@@ -162,6 +172,9 @@ class MinesweeperAI():
         # List of sentences about the game known to be true
         self.knowledge = []
 
+        # Find the neighbors of every cell once, since they never change
+        self.neighbors = neighboring_cells(height, width)
+
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
@@ -192,21 +205,8 @@ class MinesweeperAI():
         # Mark cell as safe
         self.mark_safe(cell)
 
-        # Find neighboring cells
-        neighbors = list()
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Add neighboring cell to set only if it's in bounds
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    neighbors.append((i, j))
-
         # Create new sentence and mark known cells as safe or as mines in it
-        new_sentence = Sentence(neighbors, count)
+        new_sentence = Sentence(self.neighbors[cell], count)
 
         for safe in self.safes:
             new_sentence.mark_safe(safe)
@@ -231,15 +231,24 @@ class MinesweeperAI():
             self.mark_mine(mine)
 
         # Add inferences to KB (check for duplicates)
-        for superset, subset in itertools.permutations(self.knowledge, 2):
-            inference = self.make_inference(superset, subset)
-            if inference is not None and inference not in self.knowledge:
-                self.knowledge.append(inference)
+        # Only a strictly larger sentence can be a superset, so compare each
+        # sentence against the longer ones that follow it in size order
+        ranked = sorted(self.knowledge, key=lambda sentence: len(sentence.cells))
+        known = {(frozenset(sentence.cells), sentence.count) for sentence in self.knowledge}
+        for i, subset in enumerate(ranked):
+            for superset in ranked[i + 1:]:
+                if len(superset.cells) == len(subset.cells):
+                    continue
+                inference = self.make_inference(superset, subset)
+                if inference is None:
+                    continue
+                key = (frozenset(inference.cells), inference.count)
+                if key not in known:
+                    known.add(key)
+                    self.knowledge.append(inference)
 
         # Remove empty KB sentences
-        for sentence in self.knowledge:
-            if sentence.is_empty():
-                self.knowledge.remove(sentence)
+        self.knowledge = [sentence for sentence in self.knowledge if not sentence.is_empty()]
 
     def make_inference(self, superset, subset):
         """
@@ -60,26 +60,20 @@ def main():
         for person in people
     }
 
-    # Loop over all sets of people who might have the trait
+    # Loop over all sets of people who might have the gene
     names = set(people)
-    for have_trait in powerset(names):
+    for one_gene in map(frozenset, powerset(names)):
+        for two_genes in map(frozenset, powerset(names - one_gene)):
 
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
-
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
+            # Number of copies of the gene each person has in this assignment
+            copies = {
+                person: gene_copies(person, one_gene, two_genes)
+                for person in people
+            }
 
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+            # Update probabilities summed over every set of people who might have the trait
+            p = gene_probability(people, copies)
+            update_traits(probabilities, people, copies, p)
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
@@ -118,14 +112,12 @@ def load_data(filename):
 
 def powerset(s):
     """
-    Return a list of all possible subsets of set s.
+    Return an iterator over all possible subsets of set s, as tuples.
     """
     s = list(s)
-    return [
-        set(s) for s in itertools.chain.from_iterable(
-            itertools.combinations(s, r) for r in range(len(s) + 1)
-        )
-    ]
+    return itertools.chain.from_iterable(
+        itertools.combinations(s, r) for r in range(len(s) + 1)
+    )
 
 
 def joint_probability(people, one_gene, two_genes, have_trait):
@@ -139,36 +131,47 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         * everyone in set `have_trait` has the trait, and
         * everyone not in set` have_trait` does not have the trait.
     """
+    copies = {person: gene_copies(person, one_gene, two_genes) for person in people}
+    return gene_probability(people, copies) * trait_probability(people, copies, have_trait)
 
-    # Map children to the number of copies of the gene each parent has
-    children = {
-        person : (
-            gene_copies(people[person]["mother"], one_gene, two_genes),
-            gene_copies(people[person]["father"], one_gene, two_genes)
-        )
-        for person in people if people[person]["mother"] and people[person]["father"]
-    }
 
-    # Initialize joint probability
+def gene_probability(people, copies):
+    """
+    Compute and return the probability that everyone has the number
+    of copies of the gene given by `copies`, which maps each person to 0, 1 or 2.
+    """
+
+    # Initialize probability
     probability = 1
 
     for person in people:
-
-        # Number of copies of the gene `person` has
-        copies = gene_copies(person, one_gene, two_genes)
-
-        # Whether `person` exhibits the trait
-        has_trait = person in have_trait
+        mother = people[person]["mother"]
+        father = people[person]["father"]
 
         # Probability that `person` has 0, 1 or 2 copies of the gene
-        if person in children:  # If they have parents
-            probability *= gets_gene(children[person], copies)
+        if mother and father:  # If they have parents
+            probability *= gets_gene((copies[mother], copies[father]), copies[person])
 
         else:  # If they don't have parents
-            probability *= PROBS["gene"][copies]
+            probability *= PROBS["gene"][copies[person]]
+
+    return probability
+
+
+def trait_probability(people, copies, have_trait):
+    """
+    Compute and return the probability that everyone in `have_trait`
+    has the trait and everyone else doesn't, given the number of
+    copies of the gene each person has (`copies`).
+    """
+
+    # Initialize probability
+    probability = 1
+
+    for person in people:
 
         # Probability that `person` has the trait or doesn't
-        probability *= PROBS["trait"][copies][has_trait]
+        probability *= PROBS["trait"][copies[person]][person in have_trait]
 
     return probability
 
@@ -248,6 +251,40 @@ def update(probabilities, one_gene, two_genes, have_trait, p):
             probabilities[person]["trait"][False] += p
 
 
+def update_traits(probabilities, people, copies, p):
+    """
+    Add to `probabilities` the joint probabilities of the gene assignment
+    `copies`, with gene probability `p`, and every set of people who might have the trait.
+
+    Given the genes, each person's trait is independent of everyone else's,
+    so the sum over all trait sets factors into one sum per person instead
+    of looping over 2^N sets. People with a known trait only contribute
+    the probability of that trait.
+    """
+
+    # Probability of each person's possible traits, given their genes
+    traits = {}
+    for person in people:
+        known = people[person]["trait"]
+        traits[person] = {
+            trait: PROBS["trait"][copies[person]][trait]
+            for trait in (True, False) if known is None or trait == known
+        }
+
+    # Sum of joint probabilities over all trait sets consistent with the evidence
+    total = p
+    for person in people:
+        total *= sum(traits[person].values())
+
+    for person in people:
+        probabilities[person]["gene"][copies[person]] += total
+
+        # Share of the total in which `person` has each trait
+        person_total = sum(traits[person].values())
+        for trait, trait_p in traits[person].items():
+            probabilities[person]["trait"][trait] += total * trait_p / person_total
+
+
 def normalize(probabilities):
     """
     Update `probabilities` such that each probability distribution
@@ -1,3 +1,4 @@
+import itertools
 import os
 import random
 import re
@@ -8,6 +9,9 @@ DAMPING = 0.85
 SAMPLES = 10000
 THRESHOLD = 0.001
 
+# Matches the target of every <a href="..."> link in a page
+LINK_RE = re.compile(r"<a\s+[^>]*?href=\"([^\"]*)\"")
+
 
 def main():
     if len(sys.argv) != 2:
@@ -37,15 +41,12 @@ def crawl(directory):
             continue
         with open(os.path.join(directory, filename)) as f:
             contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
+            links = LINK_RE.findall(contents)
             pages[filename] = set(links) - {filename}
 
     # Only include links to other pages in the corpus
     for filename in pages:
-        pages[filename] = set(
-            link for link in pages[filename]
-            if link in pages
-        )
+        pages[filename] &= pages.keys()
 
     return pages
 
@@ -87,22 +88,27 @@ def sample_pagerank(corpus, damping_factor, n):
     PageRank values should sum to 1.
     """
 
-    # Initialize list of samples to random page
-    samples = [random.choice(list(corpus.keys()))]
+    # Compute each page's transition model once, as outcomes and cumulative weights
+    pages = list(corpus.keys())
+    outcomes = dict()
+    cum_weights = dict()
+    for page in pages:
+        distribution = transition_model(corpus, page, damping_factor)
+        outcomes[page] = list(distribution.keys())
+        cum_weights[page] = list(itertools.accumulate(distribution.values()))
 
-    # Generate remaining samples based on transition model
-    for i in range(n - 1):
-        next = transition_model(corpus, samples[i], damping_factor)
-        samples.extend(
-            random.choices(list(next.keys()), weights=next.values(), k=1)
-        )
+    # Count samples from each page, starting with a page at random
+    counts = Counter()
+    current = random.choice(pages)
+    for i in range(n):
+        counts[current] += 1
 
-    # Count samples from each page
-    counts = Counter(samples)
+        # Choose next sample based on transition model
+        current = random.choices(outcomes[current], cum_weights=cum_weights[current], k=1)[0]
 
     # Estimate PageRank from sample counts
     pagerank = dict()
-    for page in counts.keys():
+    for page in pages:
         pagerank[page] = counts[page] / n
 
     return pagerank
@@ -118,33 +124,46 @@ def iterate_pagerank(corpus, damping_factor):
     PageRank values should sum to 1.
     """
 
-    # Initialize PageRank and convergence values
+    # Build the transition matrix once, as a sparse mapping from each page
+    # to the pages that link to it and the probability of following that link
+    links_to = {page: [] for page in corpus}
+    for other, links in corpus.items():
+        for page in links:
+            if page != other:
+                links_to[page].append((other, damping_factor / len(links)))
+
+    # Pages with no links are treated as linking to every page in the corpus,
+    # so they add the same amount to every page instead of one column each
+    dangling = [page for page in corpus if not corpus[page]]
+    base = (1 - damping_factor) / len(corpus)
+
+    # Initialize PageRank values
     pagerank = dict()
-    convergence = dict()
     for page in corpus.keys():
         pagerank[page] = 1 / len(corpus)
-        convergence[page] = False
 
     # Update PageRank values until convergence
-    while not all(convergence.values()):
+    while True:
 
-        # Compute PageRank for each page
+        # Probability shared by all pages this iteration
+        shared = base + damping_factor * sum(pagerank[page] for page in dangling) / len(corpus)
+
+        # Compute PageRank for each page as one matrix-vector product
         current = dict()
-        for page in pagerank.keys():
-            current[page] = (1 - damping_factor) / len(corpus)
-            for other in pagerank.keys():
-                if other != page and page in corpus[other]:
-                    current[page] += damping_factor * pagerank[other] / len(corpus[other])
-                if not corpus[other]:
-                    current[page] += damping_factor * pagerank[other] / len(corpus)
-
-        # Mark pages whose values have converged
-        for page, value in pagerank.items():
-            if abs(current[page] - value) <= THRESHOLD:
-                convergence[page] = True
+        for page, sources in links_to.items():
+            current[page] = shared + sum(
+                pagerank[other] * weight for other, weight in sources
+            )
+
+        # Largest change of any page in this iteration
+        delta = max(abs(current[page] - value) for page, value in pagerank.items())
 
         # Update PageRank values to the current ones
-        pagerank = current.copy()
+        pagerank = current
+
+        # Stop once no page changed by more than the threshold
+        if delta <= THRESHOLD:
+            break
 
     return pagerank
 
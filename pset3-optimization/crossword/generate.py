@@ -1,5 +1,5 @@
 import sys
-import copy
+from collections import defaultdict, deque
 
 from crossword import *
 
@@ -11,10 +11,24 @@ class CrosswordCreator():
         Create new CSP crossword generate.
         """
         self.crossword = crossword
+
+        # Start each domain with the words of the variable's length only,
+        # so domains are node-consistent from the start
+        words_by_length = defaultdict(set)
+        for word in self.crossword.words:
+            words_by_length[len(word)].add(word)
         self.domains = {
-            var: self.crossword.words.copy()
+            var: words_by_length[var.length].copy()
             for var in self.crossword.variables
         }
+        self.index_domains()
+
+        # Neighbors never change, so find them once for each variable
+        self.neighbors = {
+            var: frozenset(self.crossword.neighbors(var))
+            for var in self.crossword.variables
+        }
+        self.degree = {var: len(self.neighbors[var]) for var in self.neighbors}
 
     def letter_grid(self, assignment):
         """
@@ -88,9 +102,9 @@ class CrosswordCreator():
 
     def solve(self):
         """
-        Enforce node and arc consistency, and then solve the CSP.
+        Enforce arc consistency, and then solve the CSP.
+        (Domains are already node-consistent, see `__init__`.)
         """
-        self.enforce_node_consistency()
         self.ac3()
         return self.backtrack(dict())
 
@@ -114,6 +128,83 @@ class CrosswordCreator():
             for word in inconsistent:
                 domain.remove(word)
 
+        # Index the remaining domain values by letter position
+        self.index_domains()
+
+    def index_domains(self):
+        """
+        Build `self.letter_index`, mapping each variable to a list with one
+        dict per position of the word, from each letter to the set of words
+        in the variable's domain with that letter at that position.
+        """
+        self.letter_index = dict()
+        self.indexed_domains = dict()
+        for var in self.domains:
+            self.index_domain(var)
+
+    def index_domain(self, var):
+        """
+        Rebuild the entry of `self.letter_index` for `var` from its current
+        domain in `self.domains`.
+        """
+        domain = self.domains[var]
+        index = [defaultdict(set) for _ in range(var.length)]
+        for word in domain:
+            for k in range(var.length):
+                index[k][word[k]].add(word)
+        self.letter_index[var] = index
+        self.indexed_domains[var] = (domain, len(domain))
+
+    def letters(self, var):
+        """
+        Return the entry of `self.letter_index` for `var`, first rebuilding it
+        if `self.domains` has been changed without going through
+        `remove_values` or `restore_domains` (e.g. assigned by the caller).
+        """
+        domain = self.domains[var]
+        indexed, size = self.indexed_domains.get(var, (None, 0))
+        if indexed is not domain or size != len(domain):
+            self.index_domain(var)
+        return self.letter_index[var]
+
+    def remove_values(self, var, words):
+        """
+        Remove `words` from the domain of `var`, keeping
+        `self.letter_index` in sync.
+        """
+        index = self.letters(var)
+        domain = self.domains[var]
+        for word in words:
+            domain.remove(word)
+            for k in range(var.length):
+                index[k][word[k]].remove(word)
+                if not index[k][word[k]]:
+                    del index[k][word[k]]
+        self.indexed_domains[var] = (domain, len(domain))
+
+    def snapshot_domains(self, variables):
+        """
+        Return a mapping from each of `variables` to a copy of its domain.
+
+        Each domain set is copied on its own: words are immutable strings that
+        can be shared, so a deep copy would only add cost.
+        """
+        return {var: self.domains[var].copy() for var in variables}
+
+    def restore_domains(self, saved):
+        """
+        Put back into `self.domains` (and `self.letter_index`) every value
+        removed since `saved`, a snapshot from `snapshot_domains`, was taken.
+        """
+        for var, domain in saved.items():
+            index = self.letters(var)
+            current = self.domains[var]
+            for word in domain - current:
+                current.add(word)
+                for k in range(var.length):
+                    index[k][word[k]].add(word)
+            self.indexed_domains[var] = (current, len(current))
+
     def revise(self, x, y):
         """
         Make variable `x` arc consistent with variable `y`.
@@ -131,25 +222,19 @@ class CrosswordCreator():
         if self.crossword.overlaps[x, y]:
             i, j = self.crossword.overlaps[x, y]
 
-            # Keep track of inconsistent domain values
-            inconsistent = set()
+            # Letters that `y`'s domain values have at the overlap
+            supports = self.letters(y)[j]
 
-            # Check all of `x`'s domain values
-            for w1 in self.domains[x]:
-
-                # At least one value of `y` must be consistent
-                consistent = any(
-                    w1[i] == w2[j] for w2 in self.domains[y]
-                )
-
-                # Otherwise, add value to `inconsistent`
-                if not consistent:
-                    inconsistent.add(w1)
-                    revised = True
+            # Values of `x` whose letter at the overlap no value of `y` has
+            inconsistent = set()
+            for letter, words in self.letters(x)[i].items():
+                if letter not in supports:
+                    inconsistent.update(words)
 
             # Remove `x`'s inconsistent values
-            for word in inconsistent:
-                self.domains[x].remove(word)
+            if inconsistent:
+                self.remove_values(x, inconsistent)
+                revised = True
 
         return revised
 
@@ -164,20 +249,23 @@ class CrosswordCreator():
         """
 
         # Initialize queue to arcs
-        if arcs:
-            queue = arcs
+        if arcs is not None:
+            queue = deque(arcs)
         else:
-            queue = []
+            queue = deque()
             for v1 in self.crossword.variables:
-                for v2 in self.crossword.neighbors(v1):
+                for v2 in self.neighbors[v1]:
                     queue.append((v1, v2))
 
+        # Keep track of arcs in queue for constant-time membership checks
+        in_queue = set(queue)
+
         # While queue isn't empty
         while queue:
 
             # Take next arc
-            x, y = queue[0]
-            queue = queue[1:]
+            x, y = queue.popleft()
+            in_queue.discard((x, y))
 
             # Enforce arc consistency
             if self.revise(x, y):
@@ -187,9 +275,10 @@ class CrosswordCreator():
                     return False
 
                 # Add `x`'s arcs to queue to check consistency still holds
-                for z in self.crossword.neighbors(x):
-                    if z != y and (z, x) not in queue:
+                for z in self.neighbors[x]:
+                    if z != y and (z, x) not in in_queue:
                         queue.append((z, x))
+                        in_queue.add((z, x))
 
         return True
 
@@ -200,12 +289,30 @@ class CrosswordCreator():
         """
         return all(var in assignment for var in self.crossword.variables)
 
-    def consistent(self, assignment):
+    def consistent(self, assignment, var=None):
         """
         Return True if `assignment` is consistent (i.e., words fit in crossword
         puzzle without conflicting characters); return False otherwise.
+
+        If `var` is given, the rest of `assignment` is assumed to be consistent
+        already and to use different words from `var`, so only the constraints
+        involving `var` are checked.
         """
 
+        # Only check the variable that was just assigned
+        if var is not None:
+            word = assignment[var]
+            if len(word) != var.length:
+                return False
+
+            for neighbor in self.neighbors[var]:
+                if neighbor in assignment:
+                    i, j = self.crossword.overlaps[var, neighbor]
+                    if word[i] != assignment[neighbor][j]:
+                        return False
+
+            return True
+
         # Assignment values must be distinct
         words = assignment.values()
         if len(words) != len(set(words)):
@@ -217,7 +324,7 @@ class CrosswordCreator():
             if len(word) != var.length:
                 return False
 
-            for neighbor in self.crossword.neighbors(var):
+            for neighbor in self.neighbors[var]:
                 if neighbor in assignment:
                     i, j = self.crossword.overlaps[var, neighbor]
                     if assignment[var][i] != assignment[neighbor][j]:
@@ -233,27 +340,28 @@ class CrosswordCreator():
         that rules out the fewest values among the neighbors of `var`.
         """
 
+        # Unassigned neighbors, with their domain size and letter index at the
+        # overlap, which don't depend on the value of `var` being counted
+        pairs = []
+        for neighbor in self.neighbors[var]:
+            if neighbor not in assignment:
+                i, j = self.crossword.overlaps[var, neighbor]
+                pairs.append((
+                    i, len(self.domains[neighbor]), self.letters(neighbor)[j]
+                ))
+
         # Keep track of inconsistent values for each value of `var`
         domain = dict()
 
         # Loop over `var`'s domain values
         for w1 in self.domains[var]:
 
-            # Initialize count
-            count = 0
-
-            # Count many neighbors' values are ruled out by current value
-            for neighbor in self.crossword.neighbors(var):
-                if neighbor in assignment:
-                    continue
-
-                for w2 in self.domains[neighbor]:
-                    i, j = self.crossword.overlaps[var, neighbor]
-                    if w1[i] != w2[j]:
-                        count += 1
-
-            # Store total in `domain`
-            domain[w1] = count
+            # Count many neighbors' values are ruled out by current value, i.e.
+            # those without the same letter at the overlap
+            domain[w1] = sum(
+                size - len(index.get(w1[i], ()))
+                for i, size, index in pairs
+            )
 
         # Return values in order (least-constraining values first)
         return sorted(domain, key=lambda x: domain[x])
@@ -267,28 +375,16 @@ class CrosswordCreator():
         return values.
         """
 
-        # Initialize unassigned variables
-        unassigned = [
+        # Minimum remaining values first, then highest degree
+        unassigned = (
             var for var in self.crossword.variables
             if var not in assignment
-        ]
-
-        # Sort them by domain size (minimum remaining values first)
-        ranked = sorted(
+        )
+        return min(
             unassigned,
-            key=lambda x: len(self.domains[x])
+            key=lambda x: (len(self.domains[x]), -self.degree[x])
         )
 
-        # Sort them by degree if tied (highest degree first)
-        if unassigned == ranked:
-            ranked = sorted(
-                unassigned,
-                key=lambda x: len(self.crossword.neighbors(x)),
-                reverse=True
-            )
-
-        return ranked[0]
-
     def backtrack(self, assignment):
         """
         Using Backtracking Search, take as input a partial assignment for the
@@ -299,25 +395,84 @@ class CrosswordCreator():
         If no assignment is possible, return None.
         """
 
+        # Words assigned to some variable, starting from the partial assignment
+        self.used_words = set(assignment.values())
+
         # Return assignment if all variables have been assigned a value
-        if self.assignment_complete(assignment):
+        remaining = len(self.crossword.variables) - len(assignment)
+        if remaining == 0:
             return assignment
 
-        # Otherwise, select an unassigned variable and assign a value
-        var = self.select_unassigned_variable(assignment)
-        for value in self.order_domain_values(var, assignment):
-            assignment[var] = value
+        # Search with an explicit stack of frames instead of recursion, where
+        # each frame holds a variable, an iterator over its remaining values
+        # and its saved domains
+        stack = [self.search_frame(assignment)]
+        while stack:
+            var, values, saved = stack[-1]
+
+            # Undo the value last tried for `var` (and its inferences), if any
+            if var in assignment:
+                self.restore_domains(saved)
+                self.used_words.discard(assignment.pop(var))
+                remaining += 1
+
+            for value in values:
+
+                # Assignment values must be distinct
+                if value in self.used_words:
+                    continue
 
-            # Call `backtrack` recursively until assignment is complete/None
-            if self.consistent(assignment):
-                    result = self.backtrack(assignment)
-                    if result:
-                        return result
+                assignment[var] = value
+                if not self.consistent(assignment, var):
+                    assignment.pop(var)
+                    continue
+
+                self.used_words.add(value)
+                remaining -= 1
+
+                # Maintain arc consistency: reduce `var`'s domain to its
+                # value and propagate that to its unassigned neighbors
+                self.remove_values(var, self.domains[var] - {value})
+                arcs = [
+                    (neighbor, var) for neighbor in self.neighbors[var]
+                    if neighbor not in assignment
+                ]
+                if self.ac3(arcs=arcs):
+                    break
 
-            assignment.pop(var)
+                # Undo inferences before trying the next value
+                self.restore_domains(saved)
+                self.used_words.discard(value)
+                assignment.pop(var)
+                remaining += 1
+
+            # No values left for `var`, so backtrack to the previous variable
+            else:
+                stack.pop()
+                continue
+
+            # Return assignment if all variables have been assigned a value
+            if remaining == 0:
+                return assignment
+
+            # Otherwise, move on to the next unassigned variable
+            stack.append(self.search_frame(assignment))
 
         return None
 
+    def search_frame(self, assignment):
+        """
+        Select an unassigned variable and return a backtracking search frame
+        for it: the variable, an iterator over its ordered domain values and
+        a snapshot of the unassigned domains to undo inferences with.
+        """
+        var = self.select_unassigned_variable(assignment)
+        values = iter(self.order_domain_values(var, assignment))
+        saved = self.snapshot_domains(
+            v for v in self.domains if v not in assignment
+        )
+        return var, values, saved
+
 
 def main():
 
@@ -1,7 +1,10 @@
-from nltk.tokenize import sent_tokenize, word_tokenize
 from nltk.corpus import stopwords
+from concurrent.futures import ThreadPoolExecutor
+import collections
+import heapq
 import string
 import math
+import re
 import sys
 import os
 
@@ -9,6 +12,12 @@ FILE_MATCHES = 1
 SENTENCE_MATCHES = 1
 FILTER = set(stopwords.words("english")).union(string.punctuation)
 
+# Matches words, including contractions, and numbers such as "3.0"
+TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)?|\d+(?:\.\d+)*")
+
+# Matches the space between sentences: after ".", "!" or "?" and before a capital
+SENT_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z])")
+
 
 def main():
 
@@ -24,24 +33,46 @@ def main():
     }
     file_idfs = compute_idfs(file_words)
 
+    # Count each word's occurrences in each file once, for term frequencies
+    file_tfs = {
+        filename: collections.Counter(file_words[filename])
+        for filename in file_words
+    }
+
+    # Extract and tokenize sentences from each file once, rather than per query
+    file_sentences = dict()
+    for filename in files:
+        file_sentences[filename] = dict()
+        for passage in files[filename].split("\n"):
+            for sentence in SENT_RE.split(passage.strip()):
+                if not sentence:
+                    continue
+                tokens = tokenize(sentence)
+                if tokens:
+                    file_sentences[filename][sentence] = tokens
+
+    # Sentence IDF values for each set of top files already seen
+    sentence_idfs = dict()
+
     while True:
         # Prompt user for query
         query = set(tokenize(input("Query: ")))
 
         # Determine top file matches according to TF-IDF
-        filenames = top_files(query, file_words, file_idfs, n=FILE_MATCHES)
+        filenames = top_files(
+            query, file_words, file_idfs, n=FILE_MATCHES, tfs=file_tfs
+        )
 
-        # Extract sentences from top files
+        # Gather sentences from top files
         sentences = dict()
         for filename in filenames:
-            for passage in files[filename].split("\n"):
-                for sentence in sent_tokenize(passage):
-                    tokens = tokenize(sentence)
-                    if tokens:
-                        sentences[sentence] = tokens
+            sentences.update(file_sentences[filename])
 
         # Compute IDF values across sentences
-        idfs = compute_idfs(sentences)
+        key = tuple(filenames)
+        if key not in sentence_idfs:
+            sentence_idfs[key] = compute_idfs(sentences)
+        idfs = sentence_idfs[key]
 
         # Determine top sentence matches
         matches = top_sentences(query, sentences, idfs, n=SENTENCE_MATCHES)
@@ -54,11 +85,26 @@ def load_files(directory):
     Given a directory name, return a dictionary mapping the filename of each
     `.txt` file inside that directory to the file's contents as a string.
     """
-    files = dict()
-    for filename in os.listdir(directory):
-        with open(os.path.join(directory, filename), "r") as f:
-            files[filename] = f.read()
-    return files
+    filenames = [
+        filename for filename in os.listdir(directory)
+        if filename.endswith(".txt")
+    ]
+
+    # Read files in parallel, since the GIL is released while waiting on I/O
+    with ThreadPoolExecutor() as executor:
+        contents = executor.map(
+            read_file,
+            (os.path.join(directory, filename) for filename in filenames)
+        )
+        return dict(zip(filenames, contents))
+
+
+def read_file(path):
+    """
+    Return the contents of the file at `path` as a string.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
 
 
 def tokenize(document):
@@ -70,8 +116,8 @@ def tokenize(document):
     punctuation or English stopwords.
     """
     return [
-        word.lower() for word in
-        word_tokenize(document)
+        word for word in
+        TOKEN_RE.findall(document.lower())
         if word not in FILTER
     ]
 
@@ -85,36 +131,40 @@ def compute_idfs(documents):
     resulting dictionary.
     """
 
-    # Get all words from documents
-    words = set()
+    # Count the number of documents each word appears in
+    frequencies = collections.Counter()
     for filename in documents:
-        words.update(documents[filename])
+        frequencies.update(set(documents[filename]))
 
     # Calculate word IDFs
-    idfs = dict()
-    for word in words:
-        f = sum(word in documents[filename] for filename in documents)
-        idfs[word] = math.log(len(documents) / f)
-
-    return idfs
+    return {
+        word: math.log(len(documents) / f)
+        for word, f in frequencies.items()
+    }
 
 
-def top_files(query, files, idfs, n):
+def top_files(query, files, idfs, n, tfs=None):
     """
     Given a `query` (a set of words), `files` (a dictionary mapping names of
     files to a list of their words), and `idfs` (a dictionary mapping words
     to their IDF values), return a list of the filenames of the the `n` top
     files that match the query, ranked according to tf-idf.
+
+    `tfs` optionally maps names of files to a `Counter` of their words, so
+    that term frequencies computed once can be reused across queries.
     """
+    if tfs is None:
+        tfs = {
+            filename: collections.Counter(files[filename])
+            for filename in files
+        }
     tfidfs = dict()
     for filename in files:
-        tfidf = 0
-        for word in query:
-            if word in files[filename]:
-                tf = files[filename].count(word)
-                tfidf += tf * idfs[word]
-        tfidfs[filename] = tfidf
-    return sorted(list(tfidfs), key=lambda x: tfidfs[x], reverse=True)[:n]
+        tfidfs[filename] = sum(
+            tfs[filename][word] * idfs[word]
+            for word in query if word in idfs
+        )
+    return heapq.nlargest(n, tfidfs, key=lambda x: tfidfs[x])
 
 
 def top_sentences(query, sentences, idfs, n):
@@ -129,10 +179,11 @@ def top_sentences(query, sentences, idfs, n):
     # Calculate matching word measure and query word density for sentences
     metrics = dict()
     for sentence in sentences:
-        mwm = sum(idfs[word] for word in query if word in sentences[sentence])
+        words = set(sentences[sentence])
+        mwm = sum(idfs[word] for word in query if word in words)
         qtd = sum(word in query for word in sentences[sentence]) / len(sentences[sentence])
         metrics[sentence] = (mwm, qtd)
-    return sorted(list(sentences), key=lambda x: metrics[x], reverse=True)[:n]
+    return heapq.nlargest(n, sentences, key=lambda x: metrics[x])
 
 
 if __name__ == "__main__":